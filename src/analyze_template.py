@@ -1,16 +1,69 @@
+import mmap
 import re
 import sys
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 
-def iter_streams(pdf_bytes: bytes):
-    """Yield (header, data) for each stream..endstream occurrence."""
+try:  # Optional accelerator; everything below works without it.
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Prefer SIMD-accelerated inflate when available; the isal and zlib-ng
+# bindings expose the same decompressobj/MAX_WBITS API as stdlib zlib.
+try:
+    from isal import isal_zlib as _zlib
+except ImportError:
+    try:
+        from zlib_ng import zlib_ng as _zlib
+    except ImportError:
+        _zlib = zlib
+
+# Regex for PDF drawing operators, compiled once so batch runs over many
+# files do not pay recompilation per analyze() call. The four operators are
+# fused into one alternation so each decompressed stream is scanned once
+# instead of four times; the operator literals are disjoint, so the matches
+# are the same as four separate passes. Group layout (see the dispatch in
+# analyze()): 0 rect, 1-4 its operands; 5 w, 6 its operand; 7 k, 8-11 its
+# operands; 12 K, 13-16 its operands.
+RE_OPS = re.compile(
+    rb"(?P<rect>([0-9.+-]+)\s+([0-9.+-]+)\s+([0-9.+-]+)\s+([0-9.+-]+)\s+re(?![a-zA-Z]))"
+    rb"|(?P<w>([0-9.+-]+)\s+w(?![a-zA-Z]))"
+    rb"|(?P<k>([0-9.]+)\s+([0-9.]+)\s+([0-9.]+)\s+([0-9.]+)\s+k(?![a-zA-Z]))"
+    rb"|(?P<K>([0-9.]+)\s+([0-9.]+)\s+([0-9.]+)\s+([0-9.]+)\s+K(?![a-zA-Z]))"
+)
+
+
+def iter_streams(pdf_bytes: bytes | mmap.mmap):
+    """Yield (header, data) for each Flate-encoded stream..endstream occurrence.
+
+    Non-Flate streams (e.g. embedded images) are skipped here so their payload
+    is never materialized; data is yielded as a memoryview over the original
+    buffer, which zlib accepts without a copy.
+    """
     start = 0
     while True:
         s_idx = pdf_bytes.find(b"stream", start)
         if s_idx == -1:
             return
+        # Cheap word-boundary gating: the substring also occurs inside
+        # 'endstream' and dictionary names (/Length of a stream object etc.).
+        # The real keyword follows the dictionary ('>>' or whitespace before
+        # it) and is terminated by an EOL, so reject anything else before
+        # paying for the header scans below.
+        if pdf_bytes[s_idx - 3 : s_idx] == b"end":
+            start = s_idx + 6
+            continue
+        if (
+            s_idx == 0
+            or pdf_bytes[s_idx - 1] not in b"\r\n \t>"
+            or pdf_bytes[s_idx + 6 : s_idx + 7] not in (b"\r", b"\n")
+        ):
+            start = s_idx + 6
+            continue
         # Move to end of 'stream' line (may end with CR or LF)
         line_end = pdf_bytes.find(b"\n", s_idx)
         if line_end == -1:
@@ -19,133 +72,255 @@ def iter_streams(pdf_bytes: bytes):
         e_idx = pdf_bytes.find(b"endstream", data_start)
         if e_idx == -1:
             return
+        start = e_idx + len(b"endstream")
+        # Only Flate streams are of interest downstream, so prescan for the
+        # filter name in a bounded window before 'stream' (object headers are
+        # well under 4 KiB) without materializing the dictionary. The forward
+        # find is memchr-accelerated, and non-Flate streams never pay for the
+        # backwards header scan at all.
+        window_start = max(0, s_idx - 4096)
+        if pdf_bytes.find(b"/FlateDecode", window_start, s_idx) == -1:
+            continue
         # crude header backtrack to find '<< ... >>' dictionary before 'stream'
-        hdr_start = pdf_bytes.rfind(b"<<", 0, s_idx)
+        hdr_start = pdf_bytes.rfind(b"<<", window_start, s_idx)
         hdr_end = pdf_bytes.find(b">>", hdr_start, s_idx) if hdr_start != -1 else -1
         header = (
             pdf_bytes[hdr_start : hdr_end + 2]
             if hdr_start != -1 and hdr_end != -1
             else b""
         )
-        yield header, pdf_bytes[data_start:e_idx]
-        start = e_idx + len(b"endstream")
+        yield header, memoryview(pdf_bytes)[data_start:e_idx]
 
 
-def try_decompress(data: bytes) -> bytes | None:
-    """Attempt to Flate-decompress a PDF stream payload."""
-    for wbits in (zlib.MAX_WBITS, -zlib.MAX_WBITS):
+# Streaming-inflate granularity, and the buffer tail carried between chunks
+# so operator matches crossing a chunk boundary are not lost. No realistic
+# operand sequence (four ~16-char numbers plus operator) comes close to the
+# overlap size.
+_CHUNK_SIZE = 64 * 1024
+_SCAN_OVERLAP = 256
+
+
+def _inflate_chunks(data: bytes | memoryview):
+    """Incrementally Flate-decompress a PDF stream payload, chunk by chunk.
+
+    Caps peak memory at one chunk instead of the fully inflated stream. The
+    wbits variant is picked by probing the first chunk, mirroring the old
+    whole-buffer fallback; raises zlib.error if neither variant fits or the
+    deflate stream ends prematurely, matching zlib.decompress, which errors
+    on truncation but tolerates trailing bytes after a terminated stream.
+    """
+    mv = memoryview(data)
+    for wbits in (_zlib.MAX_WBITS, -_zlib.MAX_WBITS):
+        d = _zlib.decompressobj(wbits)
         try:
-            return zlib.decompress(data, wbits)
-        except Exception:
+            first = d.decompress(mv[:_CHUNK_SIZE])
+        except _zlib.error:
             continue
-    return None
+        break
+    else:
+        raise _zlib.error("payload is not a Flate stream")
+    yield first
+    for pos in range(_CHUNK_SIZE, len(mv), _CHUNK_SIZE):
+        yield d.decompress(mv[pos : pos + _CHUNK_SIZE])
+    yield d.flush()
+    if not d.eof:
+        raise _zlib.error("incomplete or truncated Flate stream")
+
+
+if njit is not None:
+    from numba import types
+    from numba.typed import Dict
+
+    @njit(cache=True)
+    def _mode_wh(rounded):
+        """Return the most frequent (w, h) row of a quantized (N, 2) array.
+
+        Packs each row (already rounded to 3 decimals) into one int64 key and
+        counts occurrences in a typed dict — a single compiled pass instead of
+        hashing Python tuples. First-seen row wins ties, like Counter.
+        """
+        counts = Dict.empty(key_type=types.int64, value_type=types.int64)
+        for i in range(rounded.shape[0]):
+            key = (np.int64(round(rounded[i, 0] * 1000.0)) << 32) | np.int64(
+                round(rounded[i, 1] * 1000.0)
+            )
+            counts[key] = counts.get(key, np.int64(0)) + np.int64(1)
+        best_key = np.int64(0)
+        best = -1
+        for key, count in counts.items():
+            if count > best:
+                best = count
+                best_key = key
+        return (best_key >> 32) / 1000.0, (best_key & 0xFFFFFFFF) / 1000.0
+
+else:
+    _mode_wh = None
+
+
+def _scan_buffer(buf, is_final, rect_tokens, stroke_tokens, fill_tokens,
+                 stroke_cmyk_tokens):
+    """Dispatch RE_OPS matches in buf; return the unscanned tail.
+
+    Unless this is the final flush, matches reaching into the trailing
+    _SCAN_OVERLAP bytes are deferred: the returned tail (starting at the
+    first deferred match, or at the overlap boundary) is rescanned together
+    with the next chunk so boundary-crossing matches are seen exactly once.
+    """
+    cut = len(buf) if is_final else max(len(buf) - _SCAN_OVERLAP, 0)
+    for m in RE_OPS.finditer(buf):
+        if m.end() > cut:
+            cut = min(cut, m.start())
+            break
+        # groups() is fetched once per match; lastindex identifies the
+        # matched alternative via its outer group (1=rect, 6=w, 8=k, 13=K)
+        # without probing each group for None.
+        g = m.groups()
+        li = m.lastindex
+        if li == 1:
+            rect_tokens.append(g[1:5])
+        elif li == 6:
+            stroke_tokens.append(g[6])
+        elif li == 8:
+            fill_tokens.append(g[8:12])
+        else:
+            stroke_cmyk_tokens.append(g[13:17])
+    return b"" if is_final else buf[cut:]
+
+
+def _process_stream(stream_data):
+    """Inflate and scan one stream; return its token lists, or None on error.
+
+    Tokens are buffered per stream and merged by the caller only when the
+    whole payload inflates cleanly, preserving the all-or-nothing behaviour
+    for corrupt streams.
+    """
+    tokens = ([], [], [], [])
+    tail = b""
+    try:
+        for chunk in _inflate_chunks(stream_data):
+            tail = _scan_buffer(tail + chunk, False, *tokens)
+        _scan_buffer(tail, True, *tokens)
+    except Exception:
+        return None
+    return tokens
+
+
+def _unique_rows(arr: np.ndarray) -> np.ndarray:
+    """Deduplicate array rows (or scalars) while preserving first-seen order."""
+    if arr.size == 0:
+        return arr
+    axis = 0 if arr.ndim > 1 else None
+    _, idx = np.unique(arr, axis=axis, return_index=True)
+    return arr[np.sort(idx)]
 
 
 def analyze(pdf_path: Path):
-    content = pdf_path.read_bytes()
-    rects = []
-    strokes = []
-    fills_cmyk = []
-    strokes_cmyk = []
-
-    # Regex for PDF drawing operators
-    re_rect = re.compile(
-        rb"([0-9.+-]+)\s+([0-9.+-]+)\s+([0-9.+-]+)\s+([0-9.+-]+)\s+re(?![a-zA-Z])"
+    # Byte tokens per operator; NumPy converts each list to float64 in one
+    # bulk call after the scan instead of one float() per token.
+    rect_tokens = []
+    stroke_tokens = []
+    fill_tokens = []
+    stroke_cmyk_tokens = []
+
+    # Memory-map the file instead of reading it onto the heap; pages are
+    # demand-loaded by the OS and find/rfind/regex work on the map directly.
+    with open(pdf_path, "rb") as f:
+        try:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Zero-length files cannot be mapped; nothing to scan either way.
+            content = b""
+        if content and hasattr(mmap, "MADV_SEQUENTIAL"):
+            content.madvise(mmap.MADV_SEQUENTIAL)
+        try:
+            # Per-stream work (inflate + scan) is independent, and both zlib
+            # and the regex engine release the GIL while running, so streams
+            # are dispatched to a thread pool. executor.map preserves stream
+            # order, keeping the merged token order (and thus the output)
+            # deterministic.
+            with ThreadPoolExecutor() as executor:
+                stream_results = executor.map(
+                    _process_stream,
+                    (data for _header, data in iter_streams(content)),
+                )
+                for result in stream_results:
+                    if result is None:
+                        continue
+                    rect_tokens.extend(result[0])
+                    stroke_tokens.extend(result[1])
+                    fill_tokens.extend(result[2])
+                    stroke_cmyk_tokens.extend(result[3])
+        finally:
+            if content:
+                content.close()
+
+    rects = (
+        np.array(rect_tokens, dtype=np.float64) if rect_tokens else np.empty((0, 4))
     )
-    re_line_w = re.compile(rb"([0-9.+-]+)\s+w(?![a-zA-Z])")
-    re_fill_k = re.compile(
-        rb"([0-9.]+)\s+([0-9.]+)\s+([0-9.]+)\s+([0-9.]+)\s+k(?![a-zA-Z])"
+    strokes = (
+        np.array(stroke_tokens, dtype=np.float64) if stroke_tokens else np.empty(0)
     )
-    re_stroke_K = re.compile(
-        rb"([0-9.]+)\s+([0-9.]+)\s+([0-9.]+)\s+([0-9.]+)\s+K(?![a-zA-Z])"
+    fills_cmyk = (
+        np.array(fill_tokens, dtype=np.float64) if fill_tokens else np.empty((0, 4))
+    )
+    strokes_cmyk = (
+        np.array(stroke_cmyk_tokens, dtype=np.float64)
+        if stroke_cmyk_tokens
+        else np.empty((0, 4))
     )
-
-    for header, stream_data in iter_streams(content):
-        # Only attempt Flate streams
-        if b"/FlateDecode" not in header:
-            continue
-        decompressed = try_decompress(stream_data)
-        if not decompressed:
-            continue
-        # Analyze decompressed operator stream
-        for m in re_rect.finditer(decompressed):
-            x, y, w, h = (float(m.group(i)) for i in range(1, 5))
-            rects.append((x, y, w, h))
-        for m in re_line_w.finditer(decompressed):
-            strokes.append(float(m.group(1)))
-        for m in re_fill_k.finditer(decompressed):
-            c, m_, y, k = (float(m.group(i)) for i in range(1, 5))
-            fills_cmyk.append((c, m_, y, k))
-        for m in re_stroke_K.finditer(decompressed):
-            c, m_, y, k = (float(m.group(i)) for i in range(1, 5))
-            strokes_cmyk.append((c, m_, y, k))
 
     # Deduplicate while preserving order
-    def dedup(seq):
-        seen = set()
-        out = []
-        for item in seq:
-            if item not in seen:
-                seen.add(item)
-                out.append(item)
-        return out
-
-    rects_u = dedup(rects)
-    strokes_u = dedup(strokes)
-    fills_u = dedup(fills_cmyk)
-    strokes_cmyk_u = dedup(strokes_cmyk)
+    rects_u = _unique_rows(rects)
+    strokes_u = _unique_rows(strokes)
+    fills_u = _unique_rows(fills_cmyk)
+    strokes_cmyk_u = _unique_rows(strokes_cmyk)
 
     print(f"File: {pdf_path.name}")
-    if rects_u:
+    if rects_u.size:
         # Gather unique widths/heights
-        wh = sorted({(round(w, 4), round(h, 4)) for _, _, w, h in rects_u})
+        wh = sorted({(w, h) for w, h in np.round(rects_u[:, 2:4], 4).tolist()})
         print("  Box sizes (w,h) [pt]:", wh)
         # Heuristic: choose the most common non-page rectangle size
-        candidates = [
-            (x, y, w, h)
-            for (x, y, w, h) in rects
-            if 0 < abs(w) < 500 and 0 < abs(h) < 500
-        ]
+        abs_wh = np.abs(rects[:, 2:4])
+        mask = ((0 < abs_wh) & (abs_wh < 500)).all(axis=1)
+        candidates = rects[mask]
         # Pick a target size as the mode by rounding
-        from collections import Counter
-
-        rounded = [(round(abs(w), 3), round(abs(h), 3)) for _, _, w, h in candidates]
-        if rounded:
-            mode_size, _ = Counter(rounded).most_common(1)[0]
-            tx, ty = mode_size
-            xs = sorted(
-                {
-                    round(x, 3)
-                    for (x, y, w, h) in candidates
-                    if round(abs(w), 3) == tx and round(abs(h), 3) == ty
-                }
-            )
-            ys = sorted(
-                {
-                    round(y, 3)
-                    for (x, y, w, h) in candidates
-                    if round(abs(w), 3) == tx and round(abs(h), 3) == ty
-                }
-            )
+        rounded = np.round(np.abs(candidates[:, 2:4]), 3)
+        if rounded.size:
+            if _mode_wh is not None:
+                mode_size = _mode_wh(np.ascontiguousarray(rounded))
+            else:
+                # Count unique rows in C instead of hashing Python tuples.
+                # Ties go to the first-seen row, as Counter.most_common did.
+                u, first_idx, counts = np.unique(
+                    rounded, axis=0, return_index=True, return_counts=True
+                )
+                top = np.flatnonzero(counts == counts.max())
+                winner = top[np.argmin(first_idx[top])]
+                mode_size = tuple(u[winner].tolist())
+            size_mask = (rounded == mode_size).all(axis=1)
+            xs = np.unique(np.round(candidates[size_mask, 0], 3)).tolist()
+            ys = np.unique(np.round(candidates[size_mask, 1], 3)).tolist()
             print(f"  Detected inner box size [pt]: {mode_size}")
             print(f"  X positions (unique) [pt]: {xs[:12]} ... total {len(xs)}")
             print(f"  Y positions (unique) [pt]: {ys[:12]} ... total {len(ys)}")
     else:
         print("  Box sizes: none found")
-    if strokes_u:
-        print("  Stroke widths [pt]:", [round(s, 4) for s in strokes_u])
+    if strokes_u.size:
+        print("  Stroke widths [pt]:", np.round(strokes_u, 4).tolist())
     else:
         print("  Stroke widths: none found")
-    if fills_u:
+    if fills_u.size:
         print(
-            "  Fill CMYK (0..1):", [tuple(round(v, 6) for v in t) for t in fills_u[:10]]
+            "  Fill CMYK (0..1):",
+            [tuple(t) for t in np.round(fills_u[:10], 6).tolist()],
         )
     else:
         print("  Fill CMYK: none found")
-    if strokes_cmyk_u:
+    if strokes_cmyk_u.size:
         print(
             "  Stroke CMYK (0..1):",
-            [tuple(round(v, 6) for v in t) for t in strokes_cmyk_u[:10]],
+            [tuple(t) for t in np.round(strokes_cmyk_u[:10], 6).tolist()],
         )
     else:
         print("  Stroke CMYK: none found")
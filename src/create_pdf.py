@@ -27,6 +27,11 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas  # pyright: ignore[reportMissingTypeStubs]
 import csv
 
+try:  # Optional accelerator for large CSVs; the row loop covers its absence.
+    import pandas as pd
+except ImportError:
+    pd = None
+
 # KONFIGURATION
 from typing import TypedDict, Mapping, Any
 
@@ -141,16 +146,19 @@ def color_from_location(code: str) -> colors.Color | None:
     return REGION_COLOR.get(code)
 
 
-def load_data(csv_path: str) -> list[dict[str, str]]:
-    """Read the CSV robustly and return a list of rows as dicts.
+def load_data(csv_path: str) -> list[tuple[str, str, str]]:
+    """Read the CSV robustly and return (taxon, region, autor_jahr) per row.
 
     The project has seen two slightly different CSV flavors:
     - "Original": semicolon-separated and without an 'Autor_Jahr' column.
     - "Cleaned": comma-separated with an 'Autor_Jahr' column.
 
     To be friendly to both, we:
-    1) Peek at the first line to guess the delimiter (',' vs ';').
-    2) Use csv.DictReader so rows are dictionaries keyed by column names.
+    1) Sniff the delimiter from a short peek with csv.Sniffer.
+    2) Resolve the three column indices once from the header, then read rows
+       positionally with csv.reader — downstream only ever consumed these
+       three fields, so the per-row dict that DictReader builds was wasted
+       allocation.
 
     For an R analogy: this is a tiny, dependency-free version of
     readr::read_delim() with a little delimiter sniffing.
@@ -163,18 +171,41 @@ def load_data(csv_path: str) -> list[dict[str, str]]:
     # To keep this function robust, we auto-detect the delimiter so that both
     # variants are parsed correctly and Autor_Jahr is available when present.
     with open(csv_path, newline="", encoding="utf-8-sig") as f:
-        # Peek at the first line to decide which delimiter is likely in use.
-        first_line = f.readline()
-        # Reset to the beginning for DictReader.
+        # Sniff the delimiter from a short sample rather than hand-rolled
+        # first-line heuristics; csv.Sniffer also copes with quoted fields
+        # that contain the other delimiter (e.g. commas inside a taxon).
+        sample = f.read(2048)
         f.seek(0)
-        if ";" in first_line and "," not in first_line.split(";", 1)[0]:
-            delimiter = ";"
-        else:
-            # Default to comma if we either see commas first or have a mixed header
-            # like "taxon,biogeographische_region,..." from the cleaned file.
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+        except csv.Error:
+            # Single-column or otherwise undecidable samples default to comma.
             delimiter = ","
-        reader = csv.DictReader(f, delimiter=delimiter)
-        return list(reader)  # type: ignore[no-any-return]
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return []
+
+        def column_index(*names: str) -> int:
+            for name in names:
+                if name in header:
+                    return header.index(name)
+            return -1
+
+        # Accept both column spellings for the region: "biogeographische_region"
+        # (underscore, original file) and "biogeographische.region" (dot,
+        # cleaned file).
+        i_taxon = column_index("taxon")
+        i_region = column_index("biogeographische_region", "biogeographische.region")
+        i_autor = column_index("Autor_Jahr")
+
+        def field(row: list[str], index: int) -> str:
+            return row[index] if 0 <= index < len(row) else ""
+
+        return [
+            (field(row, i_taxon), field(row, i_region), field(row, i_autor))
+            for row in reader
+        ]
 
 
 def compute_cell_size(page_width: float, page_height: float) -> tuple[float, float]:
@@ -222,7 +253,7 @@ def derive_bold_italic_font_name(base_name: str) -> str:
     return f"{base_name}-BoldOblique"
 
 
-def build_label_specs(data: list[dict[str, str]]) -> list[LabelSpec]:
+def build_label_specs(data: list[tuple[str, str, str]]) -> list[LabelSpec]:
     """
     Convert CSV rows into a flat list of label specifications.
 
@@ -236,30 +267,28 @@ def build_label_specs(data: list[dict[str, str]]) -> list[LabelSpec]:
         2. Second label: third word, bold (no underline) and Autor_Jahr in the lower right.
     - All other cases fall back to a single label using the full normalized taxon string
       as the center text, without underlining; Autor_Jahr is printed if present.
+
+    With pandas installed the rules are applied column-wise over the whole
+    table instead of row by row; the per-row loop below remains the reference
+    implementation and the fallback.
     """
+    if pd is not None and data:
+        return _build_label_specs_vectorized(data)
+
     specs: list[LabelSpec] = []
 
-    for item in data:
-        # Pull and normalize the taxon string. We strip and collapse whitespace
-        # so that "Homo  sapiens " becomes "Homo sapiens". This makes the
-        # subsequent word counting reliable.
-        raw_taxon = item.get("taxon") or ""
-        # Normalize whitespace:
-        # - strip leading/trailing spaces (gets rid of the trailing space in case 1)
-        # - collapse multiple internal spaces to a single space
+    for raw_taxon, raw_region, raw_autor in data:
+        # Normalize the taxon string. We strip and collapse whitespace so that
+        # "Homo  sapiens " becomes "Homo sapiens". This makes the subsequent
+        # word counting reliable.
         normalized_taxon = " ".join(raw_taxon.split())
         words = normalized_taxon.split(" ") if normalized_taxon else []
 
-        # Region and author/year are read as-is (trimmed). Region codes are the
-        # short strings used in the templates: PA, AF, AS, O, NW. Accept both CSV
-        # column spellings: "biogeographische_region" (underscore) and
-        # "biogeographische.region" (dot) — the cleaned file uses the latter.
-        region_code = (
-            item.get("biogeographische_region")
-            or item.get("biogeographische.region")
-            or ""
-        ).strip()
-        autor_jahr = (item.get("Autor_Jahr") or "").strip()
+        # Region and author/year are read as-is (trimmed). Region codes are
+        # the short strings used in the templates: PA, AF, AS, O, NW; the
+        # column-spelling variants are already resolved by load_data().
+        region_code = raw_region.strip()
+        autor_jahr = raw_autor.strip()
 
         if len(words) == 2:
             # Case 1: exactly two words – single label with the second word underlined
@@ -306,6 +335,54 @@ def build_label_specs(data: list[dict[str, str]]) -> list[LabelSpec]:
     return specs
 
 
+def _build_label_specs_vectorized(data: list[tuple[str, str, str]]) -> list[LabelSpec]:
+    """Column-wise implementation of the build_label_specs rules via pandas.
+
+    The word splitting, trimming and case selection run as vectorized string
+    operations over the whole table; the two labels emitted for three-word
+    taxa are kept adjacent (and in row order) by a stable sort on the source
+    row index plus a sub-label counter.
+    """
+    df = pd.DataFrame(data, columns=["taxon", "region", "autor"])
+    region = df["region"].str.strip()
+    autor = df["autor"].str.strip()
+    # .str.split() without a pattern collapses runs of whitespace like
+    # " ".join(raw.split()) did in the row loop.
+    words = df["taxon"].str.split()
+    n_words = words.str.len()
+    normalized = words.str.join(" ")
+
+    def case_frame(mask, main_text, underline: bool, author_text, sub: int):
+        return pd.DataFrame(
+            {
+                "region_code": region[mask],
+                "main_text": main_text,
+                "underline": underline,
+                "author_text": author_text,
+                "_sub": sub,
+            }
+        )
+
+    frames = []
+    two = n_words == 2
+    if two.any():
+        frames.append(case_frame(two, words[two].str[1], True, autor[two], 0))
+    three = n_words == 3
+    if three.any():
+        # Two labels with identical region: epithet (underlined, no author)
+        # followed by the subspecies epithet with the author note.
+        frames.append(case_frame(three, words[three].str[1], True, "", 0))
+        frames.append(case_frame(three, words[three].str[2], False, autor[three], 1))
+    other = ~(two | three)
+    if other.any():
+        frames.append(case_frame(other, normalized[other], False, autor[other], 0))
+
+    combined = pd.concat(frames)
+    combined["_row"] = combined.index
+    combined = combined.sort_values(["_row", "_sub"], kind="stable")
+    return combined.drop(columns=["_row", "_sub"]).to_dict("records")
+
+
 def draw_labels(output_pdf: str, csv_path: str) -> None:
     """Render all labels from a CSV into a multi-page A4 PDF.
 
@@ -365,74 +442,86 @@ def draw_labels(output_pdf: str, csv_path: str) -> None:
     author_font_size = author_font[1]
     underline_offset: float = CONFIG["underline_offset"]
 
-    labels_per_page = rows * cols
-
-    for idx, spec in enumerate(label_specs):
-        # Determine which page we are on and the index within that page.
-        page_index = idx // labels_per_page
-        index_on_page = idx % labels_per_page
-
-        if index_on_page == 0 and idx > 0:
-            # Start a new page after the previous one filled up.
-            c.showPage()
+    # Width lookups repeat heavily because species epithets and author names
+    # recur across rows; font-metric walks are the slow part of ReportLab
+    # text handling, so memoize them for the duration of this run.
+    width_cache: dict[tuple[str, str, float], float] = {}
+
+    def string_width(text: str, font_name: str, size: float) -> float:
+        key = (text, font_name, size)
+        width = width_cache.get(key)
+        if width is None:
+            width = c.stringWidth(text, font_name, size)
+            width_cache[key] = width
+        return width
+
+    # ReportLab writes a PDF operator for every color/line-width call even
+    # when the value is unchanged, and consecutive labels very often share
+    # the same region color. Track the last-set state and skip no-ops; the
+    # trackers are reset at each page break because the graphics state does
+    # not carry over into a new page's content stream.
+    last_fill: colors.Color | None = None
+    last_stroke: colors.Color | None = None
+    last_line_width: float | None = None
+
+    def set_fill(color: colors.Color) -> None:
+        nonlocal last_fill
+        if color is not last_fill:
+            c.setFillColor(color)
+            last_fill = color
+
+    def set_stroke(color: colors.Color) -> None:
+        nonlocal last_stroke
+        if color is not last_stroke:
+            c.setStrokeColor(color)
+            last_stroke = color
+
+    def set_line_width(width: float) -> None:
+        nonlocal last_line_width
+        if width != last_line_width:
+            c.setLineWidth(width)
+            last_line_width = width
 
-        # Compute the target grid cell from the index. Column increases left→right,
-        # row increases top→bottom inside the usable area.
-        col = index_on_page % cols
-        row = index_on_page // cols
+    labels_per_page = rows * cols
 
-        # Origin for this cell (bottom-left of colored field)
-        x = margins["left"] + col * cell_w
-        # row 0 is at the top inside the usable area
-        y = page_height - margins["top"] - (row + 1) * cell_h
+    # Cell origins depend only on the column/row index, so compute them once
+    # instead of re-deriving them (with the margin dict lookups) per label.
+    xs = [margins["left"] + col * cell_w for col in range(cols)]
+    ys = [page_height - margins["top"] - (row + 1) * cell_h for row in range(rows)]
 
-        region_code = spec["region_code"]
-        field_color = color_from_location(region_code) or colors.white
+    def field_color_for(spec: LabelSpec) -> colors.Color:
         # For Europe (PA), the outside is white per template
-        if region_code == "PA":
-            field_color = colors.white
+        if spec["region_code"] == "PA":
+            return colors.white
+        return color_from_location(spec["region_code"]) or colors.white
 
-        # Draw colored field (background of the label)
-        c.setFillColor(field_color)
-        c.setStrokeColor(field_color)
-        c.rect(x, y, cell_w, cell_h, fill=1, stroke=0)
+    def draw_label_cell(spec: LabelSpec, x: float, y: float) -> None:
+        region_code = spec["region_code"]
 
         # Draw inner white box with a black border, always same size
         # Center the exact-size inner white box within the cell
         box_x = x + (cell_w - inner_w) / 2.0
         box_y = y + (cell_h - inner_h) / 2.0
 
-        c.setFillColor(colors.white)
+        set_fill(colors.white)
         # For non-Europe regions: no stroke around the white inner box
         # For Europe: white fill with black stroke of template thickness
         if region_code == "PA":
-            c.setStrokeColor(colors.black)
-            c.setLineWidth(EUROPE_STROKE_W)
+            set_stroke(colors.black)
+            set_line_width(EUROPE_STROKE_W)
             c.rect(box_x, box_y, inner_w, inner_h, fill=1, stroke=1)
         else:
             c.rect(box_x, box_y, inner_w, inner_h, fill=1, stroke=0)
 
         # Draw the main taxon element (word or full taxon) left-aligned inside the white box.
-        # We start from a global base font size and shrink only for those rare cases
-        # where the text would not fit into the inner box. The width measurement uses
-        # ReportLab's stringWidth(), which returns the width in points for a given font.
         main_text = spec["main_text"]
         if main_text:
-            c.setFillColor(colors.black)
-            # Start with the global, shared font size for all "normal" labels.
-            label_font_size = global_name_font_size
-
-            # Check whether the current text would fit into the inner width
-            # (respecting horizontal padding). If not, shrink only for this label.
-            max_text_width = (inner_w - 2 * padding_x) * 0.95
-            text_width = c.stringWidth(main_text, taxon_font_name, label_font_size)
-            if text_width > max_text_width and text_width > 0:
-                scale = max_text_width / text_width
-                # Avoid making the font unreadably small; 4pt is a conservative floor.
-                label_font_size = max(global_name_font_size * scale, 4.0)
-                text_width = c.stringWidth(
-                    main_text, taxon_font_name, label_font_size
-                )
+            set_fill(colors.black)
+            # The per-text font size (shrunk only for those rare cases where
+            # the text would not fit into the inner box) was resolved once per
+            # unique text before the loop; see font_size_map below.
+            label_font_size = font_size_map[main_text]
+            text_width = string_width(main_text, taxon_font_name, label_font_size)
 
             c.setFont(taxon_font_name, label_font_size)
             # Left alignment: keep the same vertical placement but align text to the
@@ -449,18 +538,18 @@ def draw_labels(output_pdf: str, csv_path: str) -> None:
                 # width, starting at the same x-position as the text anchor.
                 line_x0 = text_x
                 line_x1 = text_x + text_width
-                c.setStrokeColor(colors.black)
-                c.setLineWidth(0.5)
+                set_stroke(colors.black)
+                set_line_width(0.5)
                 c.line(line_x0, underline_y, line_x1, underline_y)
 
         # Draw the author and year (if requested for this label) in the lower right corner
         author_text = spec["author_text"]
         if author_text:
-            c.setFillColor(colors.black)
+            set_fill(colors.black)
             # Keep the configured font size if it fits; shrink only as needed.
             author_label_size = author_font_size
             max_author_width = (inner_w - 2 * padding_x) * 0.95
-            author_width = c.stringWidth(author_text, author_font_name, author_label_size)
+            author_width = string_width(author_text, author_font_name, author_label_size)
             if author_width > max_author_width and author_width > 0:
                 scale = max_author_width / author_width
                 author_label_size = max(author_font_size * scale, 3.0)
@@ -471,6 +560,69 @@ def draw_labels(output_pdf: str, csv_path: str) -> None:
             author_y = box_y + padding_y - 1.5
             c.drawRightString(author_x, author_y, author_text)
 
+    # Whether a text overflows depends only on the text itself — font, base
+    # size and inner width are constant for the whole run — so resolve the
+    # final font size once per unique main_text instead of re-measuring per
+    # label. The width measurement uses ReportLab's stringWidth(), which
+    # returns the width in points for a given font.
+    max_text_width = (inner_w - 2 * padding_x) * 0.95
+
+    def fitted_font_size(text: str) -> float:
+        width = string_width(text, taxon_font_name, global_name_font_size)
+        if width > max_text_width and width > 0:
+            # Avoid making the font unreadably small; 4pt is a conservative floor.
+            return max(global_name_font_size * (max_text_width / width), 4.0)
+        return global_name_font_size
+
+    font_size_map = {
+        text: fitted_font_size(text) for text in {s["main_text"] for s in label_specs}
+    }
+
+    for page_start in range(0, len(label_specs), labels_per_page):
+        if page_start > 0:
+            # Start a new page after the previous one filled up.
+            c.showPage()
+            last_fill = last_stroke = last_line_width = None
+        page_specs = label_specs[page_start : page_start + labels_per_page]
+
+        # First pass over the page: colored fields. Horizontal runs of cells
+        # sharing one color are painted as a single rect — the painter's
+        # model keeps this equivalent, since all fields lie under the inner
+        # boxes and text drawn in the second pass.
+        for row_start in range(0, len(page_specs), cols):
+            row_specs = page_specs[row_start : row_start + cols]
+            y = ys[row_start // cols]
+            run_start = 0
+            while run_start < len(row_specs):
+                field_color = field_color_for(row_specs[run_start])
+                run_end = run_start + 1
+                while (
+                    run_end < len(row_specs)
+                    and field_color_for(row_specs[run_end]) is field_color
+                ):
+                    run_end += 1
+                set_fill(field_color)
+                set_stroke(field_color)
+                c.rect(
+                    xs[run_start],
+                    y,
+                    cell_w * (run_end - run_start),
+                    cell_h,
+                    fill=1,
+                    stroke=0,
+                )
+                run_start = run_end
+
+        # Second pass: per-cell inner box, taxon text and author note.
+        for index_on_page, spec in enumerate(page_specs):
+            # Column increases left→right, row increases top→bottom inside
+            # the usable area; row 0 is at the top.
+            col = index_on_page % cols
+            row = index_on_page // cols
+            x = xs[col]
+            y = ys[row]
+            draw_label_cell(spec, x, y)
+
     c.save()
 
 
@@ -3,15 +3,32 @@ from __future__ import annotations
 
 import argparse
 import csv
+import functools
 import logging
+import os
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from math import ceil
+from itertools import chain, islice
 from pathlib import Path
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfgen import canvas
 
+try:  # Optional accelerator; everything below works without it.
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:  # Optional, needed only to merge pages rendered with --parallel.
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
 logger = logging.getLogger("unit_tray_labels")
 
 
@@ -53,6 +70,15 @@ REGION_COLORS: dict[str, colors.Color] = {
     "PA": colors.black,
 }
 
+# Interned region codes with their bar slot and color, resolved once. Specs
+# carry the canonical code objects, so the per-label render path usually
+# matches on identity before falling back to short-string equality.
+REGION_SLOTS = tuple(
+    (sys.intern(code), position, REGION_COLORS.get(code, colors.white))
+    for position, code in enumerate(BAR_ORDER)
+)
+_CANONICAL_REGIONS = {code: code for code, _, _ in REGION_SLOTS}
+
 
 def configure_logging() -> None:
     """Initialize logging with a consistent project-level format."""
@@ -63,202 +89,407 @@ def configure_logging() -> None:
     )
 
 
-def load_csv(csv_path: Path) -> list[dict[str, str]]:
-    """Read the CSV file as a list of dictionaries."""
+def iter_label_specs(csv_path: Path) -> Iterator[LabelSpec]:
+    """Stream label specs straight from the CSV rows.
+
+    Header indices are resolved once so each row is read positionally,
+    avoiding the per-row dict that DictReader would allocate.
+    """
 
     logger.info("Loading CSV data from %s", csv_path)
     if not csv_path.exists():
         logger.error("CSV file %s does not exist", csv_path)
-        return []
+        return
 
     with csv_path.open(encoding="utf-8-sig", newline="") as file:
-        reader = csv.DictReader(file)
-        rows = [row for row in reader]
-    logger.info("Loaded %d rows from CSV", len(rows))
-    return rows
-
-
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            logger.warning("CSV file %s is empty", csv_path)
+            return
+        index = {name: position for position, name in enumerate(header)}
+        taxon_i = index.get("taxon")
+        autor_i = index.get("Autor_Jahr")
+        region_i = index.get("biogeographische.region", index.get("biogeographische_region"))
+        if taxon_i is None:
+            logger.error("CSV file %s has no 'taxon' column", csv_path)
+            return
+
+        # Region cells repeat a handful of values, so each distinct raw cell
+        # is normalized and canonicalized once instead of per row.
+        region_cache: dict[str, str] = {}
+
+        count = 0
+        for row in reader:
+            taxon = row[taxon_i].strip() if taxon_i < len(row) else ""
+            if not taxon:
+                logger.warning("Skipping row without a taxon entry: %s", row)
+                continue
+
+            genus, epithet = parse_taxon(taxon)
+            author = row[autor_i].strip() if autor_i is not None and autor_i < len(row) else ""
+            if region_i is not None and region_i < len(row):
+                raw_region = row[region_i]
+                region = region_cache.get(raw_region)
+                if region is None:
+                    region = raw_region.strip().upper()
+                    region = _CANONICAL_REGIONS.get(region, region)
+                    region_cache[raw_region] = region
+            else:
+                region = ""
+            count += 1
+            yield LabelSpec(genus=genus, epithet=epithet, author=author, region=region)
+    logger.info("Built %d label specs", count)
+
+
+@functools.lru_cache(maxsize=8192)
 def parse_taxon(taxon: str) -> tuple[str, str]:
-    """Return the genus and the combined epithet pieces (italicized)."""
+    """Return the genus and the combined epithet pieces (italicized).
+
+    Taxa repeat across specimen rows, so results are memoized. The split is
+    capped after the third word, so everything past the epithet is kept as
+    one unsplit tail that is never used; None keeps the general-whitespace
+    semantics (tabs, NBSP) of an uncapped split().
+    """
 
-    cleaned = " ".join(taxon.strip().split())
-    if not cleaned:
+    words = taxon.split(None, 3)
+    if not words:
         return "", ""
 
-    words = cleaned.split(" ")
     genus = words[0].capitalize()
-    if len(words) >= 2:
-        epithet_words = words[1:3]
-        epithet = " ".join(epithet_words).lower()
-    else:
-        epithet = ""
-    return genus, epithet
-
-
-def build_label_specs(rows: list[dict[str, str]]) -> list[LabelSpec]:
-    """Convert CSV rows into label specs that drive the drawing pipeline."""
+    if len(words) < 2:
+        return genus, ""
+    return genus, " ".join(words[1:3]).lower()
 
-    specs: list[LabelSpec] = []
-    for row in rows:
-        taxon = (row.get("taxon") or "").strip()
-        if not taxon:
-            logger.warning("Skipping row without a taxon entry: %s", row)
-            continue
 
-        genus, epithet = parse_taxon(taxon)
-        autor_jahr = (row.get("Autor_Jahr") or "").strip()
-        region = (
-            row.get("biogeographische.region")
-            or row.get("biogeographische_region")
-            or ""
-        ).strip().upper()
-        specs.append(LabelSpec(genus=genus, epithet=epithet, author=autor_jahr, region=region))
-    logger.info("Built %d label specs", len(specs))
-    return specs
-
-
-def _adjust_font_size(
-    pdf: canvas.Canvas, text: str, font_name: str, base_size: float, max_width: float, min_size: float
-) -> float:
-    """Reduce the font size if the text does not fit; keep a sensible minimum."""
-
-    if not text:
-        return base_size
-
-    width = pdf.stringWidth(text, font_name, base_size)
-    if width <= max_width or width <= 0:
-        return base_size
-    scale = max_width / width
-    new_size = max(base_size * scale, min_size)
-    return new_size
-
-
-def _compute_line_gap(sizes: tuple[float, float, float]) -> float:
-    """Return the vertical gap used to equally space the three baselines."""
+# Resolved Font objects for the three label fonts; calling stringWidth on
+# these skips the registry lookup pdfmetrics.stringWidth performs per call.
+_FONTS = {
+    name: pdfmetrics.getFont(name)
+    for name in {FONT_LINE1[0], FONT_LINE2[0], FONT_LINE3[0]}
+}
 
-    max_visible = max((size for size in sizes if size > 0), default=FONT_LINE2[1])
+# Measured string widths keyed by (font_name, quarter-point size, text). The
+# label set reuses the same genera and authors heavily, so most measurements
+# after the first page are cache hits instead of font-metric walks.
+_WIDTH_CACHE: dict[tuple[str, int, str], float] = {}
+_WIDTH_CACHE_LIMIT = 50_000
+
+
+def _string_width(text: str, font_name: str, size: float) -> float:
+    """Return the width of `text`, memoizing per (font, size, text)."""
+
+    key = (font_name, round(size * 4), text)
+    width = _WIDTH_CACHE.get(key)
+    if width is None:
+        if len(_WIDTH_CACHE) > _WIDTH_CACHE_LIMIT:
+            _WIDTH_CACHE.clear()
+        font = _FONTS.get(font_name)
+        if font is None:
+            font = _FONTS[font_name] = pdfmetrics.getFont(font_name)
+        width = font.stringWidth(text, size)
+        _WIDTH_CACHE[key] = width
+    return width
+
+
+def _compute_layout(
+    genus_width: float, epithet_width: float, author_width: float, max_width: float
+) -> tuple[float, float, float, float]:
+    """Return the three line font sizes and the baseline gap for one label.
+
+    Takes widths pre-measured at the base font sizes; a negative width marks
+    an absent line, which keeps its size at 0. Oversized lines are shrunk
+    proportionally down to a per-line minimum, and the gap spaces the three
+    baselines around the largest visible size. Pure float arithmetic with no
+    ReportLab objects, so numba compiles it directly when installed.
+    """
+
+    size1 = 0.0
+    if genus_width >= 0.0:
+        size1 = FONT_LINE1[1]
+        if genus_width > max_width:
+            size1 = max(size1 * max_width / genus_width, 10.0)
+
+    size2 = 0.0
+    if epithet_width >= 0.0:
+        size2 = FONT_LINE2[1]
+        if epithet_width > max_width:
+            size2 = max(size2 * max_width / epithet_width, 8.0)
+
+    size3 = 0.0
+    if author_width >= 0.0:
+        size3 = FONT_LINE3[1]
+        if author_width > max_width:
+            size3 = max(size3 * max_width / author_width, 6.0)
+
+    max_visible = max(size1, size2, size3)
+    if max_visible <= 0.0:
+        max_visible = FONT_LINE2[1]
     desired_gap = max_visible + LABEL_VERTICAL_SPACING * 2
     max_gap = max((LABEL_HEIGHT / 2) - 6.0, 4.0)
-    return min(desired_gap, max_gap)
+    return size1, size2, size3, min(desired_gap, max_gap)
 
 
-def _draw_centered_text(
-    pdf: canvas.Canvas, text: str, font_name: str, font_size: float, center_x: float, baseline: float
-) -> None:
-    """Draw text centered around `center_x` with the specified baseline."""
+if njit is not None:
+    _compute_layout = njit(cache=True, nogil=True)(_compute_layout)
 
-    if not text:
-        return
-    pdf.setFont(font_name, font_size)
-    pdf.setFillColor(colors.black)
-    text_width = pdf.stringWidth(text, font_name, font_size)
-    pdf.drawString(center_x - text_width / 2.0, baseline, text)
 
+def _draw_centered_text(
+    pdf: canvas.Canvas,
+    text: str,
+    font_name: str,
+    font_size: float,
+    center_x: float,
+    baseline: float,
+    cur_font: tuple[str, float] | None,
+    cur_fill: colors.Color | None,
+) -> tuple[tuple[str, float] | None, colors.Color | None]:
+    """Draw text centered around `center_x` with the specified baseline.
+
+    Centering is delegated to `drawCentredString`, which measures and draws
+    in one canvas call. `cur_font` and `cur_fill` track the canvas state so
+    redundant `setFont`/`setFillColor` operators are skipped; the updated
+    pair is returned for the caller to carry forward.
+    """
 
-def _draw_colored_bars(pdf: canvas.Canvas, x: float, y: float, region: str) -> None:
-    """Draw five vertical bar placeholders at the label's right edge."""
+    if not text:
+        return cur_font, cur_fill
+    if (font_name, font_size) != cur_font:
+        pdf.setFont(font_name, font_size)
+        cur_font = (font_name, font_size)
+    if cur_fill is not colors.black:
+        pdf.setFillColor(colors.black)
+        cur_fill = colors.black
+    pdf.drawCentredString(center_x, baseline, text)
+    return cur_font, cur_fill
+
+
+def _draw_colored_bars(
+    pdf: canvas.Canvas, x: float, y: float, region: str, cur_fill: colors.Color | None
+) -> colors.Color | None:
+    """Draw the region's colored bar at the label's right edge.
+
+    The four non-matching bar slots stay white, and the page under them is
+    already white, so only the one colored bar needs a rect. Returns the
+    fill color left active on the canvas.
+    """
+
+    # Identity hits first for specs canonicalized in-process; the equality
+    # fallback covers specs that crossed a process boundary (--parallel
+    # pickles them, and unpickled strings are no longer interned).
+    for code, position, fill_color in REGION_SLOTS:
+        if code is region or code == region:
+            break
+    else:
+        return cur_fill
 
-    bars_start_x = x + LABEL_WIDTH - BAR_AREA_WIDTH
-    for index, code in enumerate(BAR_ORDER):
-        bar_x = bars_start_x + index * BAR_STRIPE_WIDTH
-        fill_color = REGION_COLORS.get(code, colors.white)
-        if code != region:
-            fill_color = colors.white
+    if fill_color is not cur_fill:
         pdf.setFillColor(fill_color)
-        pdf.rect(
-            bar_x,
-            y,
-            BAR_STRIPE_WIDTH,
-            LABEL_HEIGHT,
-            stroke=0,
-            fill=1,
-        )
-
-
-def draw_labels(label_specs: list[LabelSpec], output_pdf: Path) -> None:
-    """Lay out all labels onto an A4 canvas and write the final PDF."""
+        cur_fill = fill_color
+    pdf.rect(
+        x + LABEL_WIDTH - BAR_AREA_WIDTH + position * BAR_STRIPE_WIDTH,
+        y,
+        BAR_STRIPE_WIDTH,
+        LABEL_HEIGHT,
+        stroke=0,
+        fill=1,
+    )
+    return cur_fill
+
+
+def draw_labels(label_specs: Iterable[LabelSpec], output_pdf: Path) -> None:
+    """Lay out all labels onto an A4 canvas and write the final PDF.
+
+    Accepts any iterable and streams it, so only the label currently being
+    drawn is held in memory; totals are logged once rendering finishes.
+    """
+
+    # Compressed content streams keep the write in c.save() small, and
+    # invariant output makes repeated runs reproducible byte-for-byte.
+    c = canvas.Canvas(str(output_pdf), pagesize=A4, pageCompression=1, invariant=1)
+
+    # Last-set canvas state; `showPage` resets it, so we track it per page to
+    # skip no-op setFont/setFillColor calls.
+    cur_font: tuple[str, float] | None = None
+    cur_fill: colors.Color | None = None
+
+    # Border origins for the current page. A full page always strokes the
+    # same 16 rects, so that grid is recorded once as a Form XObject and
+    # stamped with a single Do operator at page flush; only a trailing
+    # partial page strokes its borders directly.
+    page_borders: list[tuple[float, float]] = []
+    grid_form_ready = False
+
+    def stroke_borders() -> None:
+        nonlocal grid_form_ready
+        if not page_borders:
+            return
+        if len(page_borders) == ROWS * COLUMNS:
+            if not grid_form_ready:
+                c.beginForm("tray_grid")
+                _stroke_border_path(page_borders)
+                c.endForm()
+                grid_form_ready = True
+            c.doForm("tray_grid")
+        else:
+            _stroke_border_path(page_borders)
+        page_borders.clear()
+
+    def _stroke_border_path(borders: list[tuple[float, float]]) -> None:
+        path = c.beginPath()
+        for border_x, border_y in borders:
+            path.rect(border_x, border_y, LABEL_WIDTH, LABEL_HEIGHT)
+        c.setLineWidth(LABEL_BORDER_WIDTH)
+        c.setStrokeColor(colors.black)
+        c.drawPath(path, stroke=1, fill=0)
+
+    # Cell origins never change, so compute them once instead of re-deriving
+    # row/column from the running index with modulo math per label.
+    xs = [LEFT_MARGIN + column * LABEL_WIDTH for column in range(COLUMNS)]
+    ys = [PAGE_HEIGHT - TOP_MARGIN - (row + 1) * LABEL_HEIGHT for row in range(ROWS)]
+
+    # Text geometry is invariant too: the area width is identical in every
+    # cell and the centers depend only on the column or row.
+    text_area_width = max(LABEL_WIDTH - BAR_AREA_WIDTH - 2 * TEXT_PADDING_X, 1.0)
+    text_centers_x = [x + TEXT_PADDING_X + text_area_width / 2.0 for x in xs]
+    centers_y = [y + LABEL_HEIGHT / 2.0 for y in ys]
+
+    specs_iter = iter(label_specs)
+    label_count = 0
+    page_count = 0
+    spec = next(specs_iter, None)
+    while spec is not None:
+        if page_count > 0:
+            stroke_borders()
+            c.showPage()
+            cur_font = None
+            cur_fill = None
+        page_count += 1
+
+        for row in range(ROWS):
+            for column in range(COLUMNS):
+                if spec is None:
+                    break
+
+                x = xs[column]
+                y = ys[row]
+
+                # No background fill: the page is already white, so only the
+                # colored bar and the text need ink.
+                cur_fill = _draw_colored_bars(c, x, y, spec.region, cur_fill)
+
+                page_borders.append((x, y))
+
+                text_center_x = text_centers_x[column]
+                center_y = centers_y[row]
+
+                genus_width = (
+                    _string_width(spec.genus, FONT_LINE1[0], FONT_LINE1[1])
+                    if spec.genus
+                    else -1.0
+                )
+                epithet_width = (
+                    _string_width(spec.epithet, FONT_LINE2[0], FONT_LINE2[1])
+                    if spec.epithet
+                    else -1.0
+                )
+                author_width = (
+                    _string_width(spec.author, FONT_LINE3[0], FONT_LINE3[1])
+                    if spec.author
+                    else -1.0
+                )
+
+                line1_size, line2_size, line3_size, line_gap = _compute_layout(
+                    genus_width, epithet_width, author_width, text_area_width
+                )
+                line1_y = center_y + line_gap
+                line2_y = center_y
+                line3_y = center_y - line_gap
+
+                if spec.genus:
+                    cur_font, cur_fill = _draw_centered_text(
+                        c, spec.genus, FONT_LINE1[0], line1_size,
+                        text_center_x, line1_y, cur_font, cur_fill,
+                    )
+
+                if spec.epithet:
+                    cur_font, cur_fill = _draw_centered_text(
+                        c, spec.epithet, FONT_LINE2[0], line2_size,
+                        text_center_x, line2_y, cur_font, cur_fill,
+                    )
+
+                if spec.author:
+                    cur_font, cur_fill = _draw_centered_text(
+                        c, spec.author, FONT_LINE3[0], line3_size,
+                        text_center_x, line3_y, cur_font, cur_fill,
+                    )
+
+                label_count += 1
+                spec = next(specs_iter, None)
+            if spec is None:
+                break
+
+    stroke_borders()
+    c.save()
+    logger.info("Rendered %d labels on %d pages", label_count, page_count)
+    logger.info("Saved PDF with labels at %s", output_pdf)
 
-    c = canvas.Canvas(str(output_pdf), pagesize=A4)
-    labels_per_page = ROWS * COLUMNS
-    pages = ceil(len(label_specs) / labels_per_page)
-    logger.info("Rendering %d pages for %d labels", pages, len(label_specs))
 
-    for index, spec in enumerate(label_specs):
-        if index > 0 and index % labels_per_page == 0:
-            c.showPage()
+def _render_page(page_specs: list[LabelSpec], page_path: str) -> str:
+    """Worker entry point: render one page of labels into its own PDF."""
 
-        index_on_page = index % labels_per_page
-        column = index_on_page % COLUMNS
-        row = index_on_page // COLUMNS
+    draw_labels(page_specs, Path(page_path))
+    return page_path
 
-        x = LEFT_MARGIN + column * LABEL_WIDTH
-        y = PAGE_HEIGHT - TOP_MARGIN - (row + 1) * LABEL_HEIGHT
 
-        c.setFillColor(colors.white)
-        c.rect(x, y, LABEL_WIDTH, LABEL_HEIGHT, stroke=0, fill=1)
+def draw_labels_parallel(label_specs: Iterable[LabelSpec], output_pdf: Path) -> None:
+    """Render one PDF per page in worker processes and merge them in order.
 
-        _draw_colored_bars(c, x, y, spec.region)
+    Pages are independent, so this scales with physical cores for large
+    inputs. The caches (widths, parsed taxa) re-warm per worker process.
+    Falls back to the serial renderer when pypdf is not installed.
+    """
 
-        c.setLineWidth(LABEL_BORDER_WIDTH)
-        c.setStrokeColor(colors.black)
-        c.rect(x, y, LABEL_WIDTH, LABEL_HEIGHT, stroke=1, fill=0)
-
-        text_area_left = x + TEXT_PADDING_X
-        text_area_right = x + LABEL_WIDTH - BAR_AREA_WIDTH - TEXT_PADDING_X
-        text_area_width = max(text_area_right - text_area_left, 1.0)
-        text_center_x = text_area_left + text_area_width / 2.0
-        center_y = y + LABEL_HEIGHT / 2.0
-
-        line1_size = 0.0
-        line2_size = 0.0
-        line3_size = 0.0
-
-        if spec.genus:
-            line1_size = _adjust_font_size(
-                c, spec.genus, FONT_LINE1[0], FONT_LINE1[1], text_area_width, 10.0
-            )
-        if spec.epithet:
-            line2_size = _adjust_font_size(
-                c, spec.epithet, FONT_LINE2[0], FONT_LINE2[1], text_area_width, 8.0
-            )
-        if spec.author:
-            line3_size = _adjust_font_size(
-                c, spec.author, FONT_LINE3[0], FONT_LINE3[1], text_area_width, 6.0
-            )
-
-        line_gap = _compute_line_gap((line1_size, line2_size, line3_size))
-        line1_y = center_y + line_gap
-        line2_y = center_y
-        line3_y = center_y - line_gap
-
-        if spec.genus:
-            _draw_centered_text(c, spec.genus, FONT_LINE1[0], line1_size, text_center_x, line1_y)
-
-        if spec.epithet:
-            _draw_centered_text(c, spec.epithet, FONT_LINE2[0], line2_size, text_center_x, line2_y)
-
-        if spec.author:
-            _draw_centered_text(c, spec.author, FONT_LINE3[0], line3_size, text_center_x, line3_y)
+    if PdfWriter is None:
+        logger.warning("pypdf is not installed; rendering serially instead")
+        draw_labels(label_specs, output_pdf)
+        return
 
-    c.save()
+    labels_per_page = ROWS * COLUMNS
+    specs_iter = iter(label_specs)
+    pages: list[list[LabelSpec]] = []
+    while True:
+        page = list(islice(specs_iter, labels_per_page))
+        if not page:
+            break
+        pages.append(page)
+    logger.info("Rendering %d pages across %d workers", len(pages), os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory(prefix="unit_tray_pages_") as tmp_dir:
+        page_paths = [f"{tmp_dir}/page_{number:04d}.pdf" for number in range(len(pages))]
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            rendered = list(pool.map(_render_page, pages, page_paths))
+
+        writer = PdfWriter()
+        for page_path in rendered:
+            writer.append(page_path)
+        with open(output_pdf, "wb") as file:
+            writer.write(file)
     logger.info("Saved PDF with labels at %s", output_pdf)
 
 
-def generate_pdf(csv_path: Path, output_path: Path) -> None:
+def generate_pdf(csv_path: Path, output_path: Path, parallel: bool = False) -> None:
     """Coordinate the workflow from CSV rows to rendered PDF."""
 
-    rows = load_csv(csv_path)
-    if not rows:
-        logger.warning("No rows to render; exiting without creating a PDF")
-        return
-
-    specs = build_label_specs(rows)
-    if not specs:
+    specs = iter_label_specs(csv_path)
+    first = next(specs, None)
+    if first is None:
         logger.warning("No valid label specs extracted; exiting")
         return
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    draw_labels(specs, output_path)
+    renderer = draw_labels_parallel if parallel else draw_labels
+    renderer(chain([first], specs), output_path)
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -277,6 +508,11 @@ def parse_arguments() -> argparse.Namespace:
         default=Path("output/UnitTray_Labels.pdf"),
         help="Destination path for the generated PDF.",
     )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Render pages in worker processes and merge them (requires pypdf).",
+    )
     return parser.parse_args()
 
 
@@ -290,7 +526,7 @@ def main() -> None:
         args.csv,
         args.output,
     )
-    generate_pdf(args.csv, args.output)
+    generate_pdf(args.csv, args.output, parallel=args.parallel)
 
 
 if __name__ == "__main__":